@@ -0,0 +1,151 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Service time assumed until real requests have been measured
+DEFAULT_SERVICE_SECONDS = 5.0
+
+class Overloaded(RuntimeError):
+    """Raised when a request is shed because the queue is full or too slow."""
+
+class SessionBusy(RuntimeError):
+    """Raised when a session submits a different request while one is in flight."""
+
+class Ticket:
+    """A queued or running request."""
+
+    def __init__(self, session_id: str, key: str, fn: Callable, args: tuple, stream: bool):
+        self.session_id = session_id
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.stream = stream
+        self.future: Future = Future()
+        # Pieces of a streamed result, readable while the request runs
+        self.partial: List[str] = []
+        self.attached = False
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+
+    def done(self) -> bool:
+        return self.future.done()
+
+class AdmissionController:
+    """Bounded worker pool with one in-flight request per session.
+
+    Identical repeat submissions from a session attach to its in-flight request.
+    New requests are shed when the queue is full or the estimated wait
+    would exceed the SLO.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 20, slo_seconds: float = 30.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.slo_seconds = slo_seconds
+        self._queue: deque = deque()
+        self._in_flight: Dict[str, Ticket] = {}
+        self._running = 0
+        self._service_times: deque = deque(maxlen=50)
+        self._condition = threading.Condition()
+
+        for number in range(workers):
+            threading.Thread(target=self._work, name=f"admission-{number}", daemon=True).start()
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """Build a controller from ADMISSION_WORKERS, ADMISSION_QUEUE_SIZE and ADMISSION_SLO_SECONDS."""
+        return cls(
+            workers=int(os.getenv("ADMISSION_WORKERS", "4")),
+            max_queue=int(os.getenv("ADMISSION_QUEUE_SIZE", "20")),
+            slo_seconds=float(os.getenv("ADMISSION_SLO_SECONDS", "30"))
+        )
+
+    def _service_seconds(self) -> float:
+        if not self._service_times:
+            return DEFAULT_SERVICE_SECONDS
+        return sum(self._service_times) / len(self._service_times)
+
+    def _wait_for_position(self, position: int) -> float:
+        # Called with the lock held
+        if self._running < self.workers and position <= self.workers - self._running:
+            return 0.0
+        return math.ceil(position / self.workers) * self._service_seconds()
+
+    def submit(self, session_id: str, key: str, fn: Callable, *args, stream: bool = False) -> Ticket:
+        """Queue fn(*args) for the session, or return the session's in-flight ticket.
+
+        key should identify the request's content: only a submission with the
+        same key attaches, anything else gets SessionBusy while one is running.
+
+        With stream=True, fn must return an iterator of text pieces; they are
+        collected into ticket.partial and the joined text is the result.
+        """
+        with self._condition:
+            existing = self._in_flight.get(session_id)
+            if existing is not None and not existing.done():
+                if existing.key != key:
+                    raise SessionBusy("Please wait for your current request to finish.")
+                existing.attached = True
+                return existing
+
+            position = len(self._queue) + 1
+            if len(self._queue) >= self.max_queue or \
+               self._wait_for_position(position) > self.slo_seconds:
+                raise Overloaded(
+                    "The assistant is handling a lot of requests right now. Please try again in a minute."
+                )
+
+            ticket = Ticket(session_id, key, fn, args, stream)
+            self._queue.append(ticket)
+            self._in_flight[session_id] = ticket
+            self._condition.notify()
+            return ticket
+
+    def position(self, ticket: Ticket) -> int:
+        """1-based place in the queue, or 0 once the request is running."""
+        with self._condition:
+            try:
+                return self._queue.index(ticket) + 1
+            except ValueError:
+                return 0
+
+    def estimated_wait(self, ticket: Ticket) -> float:
+        """Seconds until the ticket is expected to start."""
+        with self._condition:
+            try:
+                return self._wait_for_position(self._queue.index(ticket) + 1)
+            except ValueError:
+                return 0.0
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                ticket = self._queue.popleft()
+                self._running += 1
+
+            ticket.started_at = time.monotonic()
+            try:
+                if ticket.stream:
+                    for piece in ticket.fn(*ticket.args):
+                        ticket.partial.append(piece)
+                    ticket.future.set_result("".join(ticket.partial))
+                else:
+                    ticket.future.set_result(ticket.fn(*ticket.args))
+            except BaseException as e:
+                ticket.future.set_exception(e)
+
+            with self._condition:
+                self._running -= 1
+                self._service_times.append(time.monotonic() - ticket.started_at)
+                if self._in_flight.get(ticket.session_id) is ticket:
+                    del self._in_flight[ticket.session_id]
@@ -1,13 +1,20 @@
 import os
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, TypedDict, Annotated, Literal, Union, Optional
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, FunctionMessage
+from backends import get_chat_model
+from langchain_core.messages import HumanMessage, AIMessage, FunctionMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_core.tools import tool
 from langgraph.graph import StateGraph
+from tool_registry import ToolArgumentError, ToolRegistry
+from session_store import sessions, system_message
+from usage import ledger, usage_config
 
 # Define END constant
 END = "end"
@@ -15,6 +22,8 @@ END = "end"
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Define tools
 @tool
 def search_web(query: str) -> str:
@@ -31,6 +40,19 @@ def calculator(expression: str) -> str:
     except Exception as e:
         return f"Error evaluating expression: {str(e)}"
 
+# Register tools once; schemas and validators are built here, not per turn
+registry = ToolRegistry()
+registry.register(search_web)
+registry.register(calculator)
+
+# One system message shared by every session and turn
+AGENT_SYSTEM_MESSAGE = system_message("""
+    You are a helpful assistant with access to tools. 
+    When asked a question, determine if you need to use a tool.
+    If you need to use a tool, call the appropriate function.
+    If you have the answer, respond directly.
+    """)
+
 # Define the state
 class AgentState(TypedDict):
     messages: List
@@ -38,6 +60,8 @@ class AgentState(TypedDict):
     function_calls: Optional[List]
     pending_function_calls: Optional[List]
     function_results: Optional[List]
+    traces: Optional[List]
+    session_id: Optional[str]
 
 # Define models for each node's input and output
 class FunctionCallOutput(BaseModel):
@@ -59,7 +83,7 @@ def route_node(state: AgentState) -> str:
 def user_node(state: AgentState, user_message: str) -> AgentState:
     """Process user input."""
     messages = state.get("messages", [])
-    messages.append(HumanMessage(content=user_message))
+    messages.append(HumanMessage(content=ledger.preflight(user_message)))
     
     return {
         "messages": messages,
@@ -73,27 +97,22 @@ def agent_node(state: AgentState) -> AgentState:
     """Core agent logic."""
     messages = state.get("messages", [])
     
-    # Create system message
-    system_message = SystemMessage(content="""
-    You are a helpful assistant with access to tools. 
-    When asked a question, determine if you need to use a tool.
-    If you need to use a tool, call the appropriate function.
-    If you have the answer, respond directly.
-    """)
-    
     # Set up the agent model
-    agent_model = ChatOpenAI(temperature=0, model="gpt-3.5-turbo")
+    agent_model = get_chat_model(temperature=0, model="gpt-3.5-turbo")
     
     # Prepare the messages for the model
-    prompt_messages = [system_message] + messages
+    prompt_messages = [AGENT_SYSTEM_MESSAGE] + messages
     
-    # Available tools
-    tools = [search_web, calculator]
+    # Stop before the network call if the session is out of budget
+    session = state.get("session_id")
+    ledger.check_budget(session)
+    config = usage_config("agent", task_type="agent_loop", model="gpt-3.5-turbo", session=session, user=session)
     
     # Invoke the model
     response = agent_model.invoke(
         prompt_messages,
-        tools=tools
+        tools=registry.schemas(),
+        config=config
     )
     
     # Check if the model wants to call a function
@@ -127,46 +146,44 @@ def agent_node(state: AgentState) -> AgentState:
             "function_results": state.get("function_results", [])
         }
 
+def execute_function_call(call: Dict) -> Optional[Dict]:
+    """Run a single parsed function call and return its result record."""
+    tool = registry.get(call["name"])
+    if tool is None:
+        return None
+    
+    try:
+        arguments = json.loads(call["arguments"]) if isinstance(call["arguments"], str) else call["arguments"]
+        function_call = FunctionCallOutput(name=call["name"], arguments=tool.validate(arguments))
+    except (ValueError, ToolArgumentError) as e:
+        result = f"Invalid arguments for {call['name']}: {str(e)}"
+    else:
+        try:
+            result = tool(function_call.arguments)
+        except Exception as e:
+            result = f"Error executing {call['name']}: {str(e)}"
+    
+    return {
+        "name": call["name"],
+        "result": result,
+        "id": call["id"]
+    }
+
 def function_node(state: AgentState) -> AgentState:
     """Execute function calls."""
     messages = state.get("messages", [])
     pending_calls = state.get("pending_function_calls", [])
     
-    available_tools = {
-        "search_web": search_web,
-        "calculator": calculator
-    }
-    
     results = []
     
     for call in pending_calls:
-        tool_name = call["name"]
-        tool_args = eval(call["arguments"]) if isinstance(call["arguments"], str) else call["arguments"]
-        
-        if tool_name in available_tools:
-            tool_fn = available_tools[tool_name]
-            try:
-                result = tool_fn(**tool_args)
-                results.append({
-                    "name": tool_name,
-                    "result": result,
-                    "id": call["id"]
-                })
-                messages.append(FunctionMessage(
-                    name=tool_name,
-                    content=result
-                ))
-            except Exception as e:
-                error_message = f"Error executing {tool_name}: {str(e)}"
-                results.append({
-                    "name": tool_name,
-                    "result": error_message,
-                    "id": call["id"]
-                })
-                messages.append(FunctionMessage(
-                    name=tool_name,
-                    content=error_message
-                ))
+        result = execute_function_call(call)
+        if result is not None:
+            results.append(result)
+            messages.append(FunctionMessage(
+                name=result["name"],
+                content=result["result"]
+            ))
     
     return {
         "messages": messages,
@@ -176,14 +193,166 @@ def function_node(state: AgentState) -> AgentState:
         "function_results": state.get("function_results", []) + results
     }
 
+# Streaming mode: tools start while the model is still generating
+class ToolCallAccumulator:
+    """Assemble one streamed tool call and detect when its arguments are complete."""
+    
+    def __init__(self, index: int):
+        self.index = index
+        self.id = None
+        self.name = ""
+        self.arguments = ""
+        self.complete = False
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+    
+    def feed(self, delta: Dict) -> bool:
+        """Consume a tool-call delta; return True once the arguments JSON is closed."""
+        if delta.get("id"):
+            self.id = delta["id"]
+        function = delta.get("function") or {}
+        if function.get("name"):
+            self.name += function["name"]
+        
+        fragment = function.get("arguments") or ""
+        self.arguments += fragment
+        
+        # Track JSON nesting across fragments so we never re-scan the buffer
+        for char in fragment:
+            if self.complete:
+                break
+            if self._escape:
+                self._escape = False
+            elif self._in_string:
+                if char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                self._started = True
+            elif char in "}]":
+                self._depth -= 1
+                if self._started and self._depth == 0:
+                    self.complete = True
+        
+        return self.complete
+    
+    def to_call(self) -> Dict:
+        """Return the call in the same shape agent_node produces."""
+        return {
+            "name": self.name,
+            "arguments": self.arguments,
+            "id": self.id
+        }
+
+def _timed_function_call(call: Dict):
+    """Execute a call and report how long the tool took."""
+    started = time.perf_counter()
+    result = execute_function_call(call)
+    return result, time.perf_counter() - started
+
+def streaming_agent_node(state: AgentState) -> AgentState:
+    """Core agent logic that runs each tool as soon as its arguments have streamed in."""
+    messages = state.get("messages", [])
+    
+    # Set up the agent model
+    agent_model = get_chat_model(temperature=0, model="gpt-3.5-turbo", streaming=True)
+    
+    # Prepare the messages for the model
+    prompt_messages = [AGENT_SYSTEM_MESSAGE] + messages
+    
+    # Stop before the network call if the session is out of budget
+    session = state.get("session_id")
+    ledger.check_budget(session)
+    config = usage_config("agent", task_type="agent_loop", model="gpt-3.5-turbo", session=session, user=session)
+    
+    content = ""
+    accumulators = {}
+    futures = {}
+    started = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for chunk in agent_model.stream(prompt_messages, tools=registry.schemas(), config=config):
+            content += chunk.content or ""
+            for delta in chunk.additional_kwargs.get("tool_calls") or []:
+                index = delta.get("index", 0)
+                accumulator = accumulators.setdefault(index, ToolCallAccumulator(index))
+                if accumulator.feed(delta) and index not in futures:
+                    futures[index] = executor.submit(
+                        _timed_function_call, accumulator.to_call()
+                    )
+        
+        generation_done = time.perf_counter()
+        
+        # Anything whose arguments never closed cleanly runs now, as before
+        for index, accumulator in accumulators.items():
+            if index not in futures:
+                futures[index] = executor.submit(
+                    _timed_function_call, accumulator.to_call()
+                )
+        
+        outcomes = [futures[index].result() for index in sorted(futures)]
+    
+    finished = time.perf_counter()
+    
+    if not accumulators:
+        # No function call, just add the response to messages
+        messages.append(AIMessage(content=content))
+        return {
+            "messages": messages,
+            "current_node": END,
+            "function_calls": state.get("function_calls", []),
+            "pending_function_calls": [],
+            "function_results": state.get("function_results", [])
+        }
+    
+    calls = [accumulators[index].to_call() for index in sorted(accumulators)]
+    results = []
+    tool_seconds = 0.0
+    for result, duration in outcomes:
+        tool_seconds += duration
+        if result is not None:
+            results.append(result)
+            messages.append(FunctionMessage(
+                name=result["name"],
+                content=result["result"]
+            ))
+    
+    # Sequential execution would have started every tool after generation ended
+    wait_seconds = finished - generation_done
+    trace = {
+        "turn": len(state.get("traces") or []) + 1,
+        "tool_calls": len(calls),
+        "generation_seconds": generation_done - started,
+        "tool_seconds": tool_seconds,
+        "post_generation_wait_seconds": wait_seconds,
+        "latency_saved_seconds": max(tool_seconds - wait_seconds, 0.0)
+    }
+    logger.info("Streaming turn %(turn)d saved %(latency_saved_seconds).3fs", trace)
+    
+    # Tools already ran, so go straight back to the agent
+    return {
+        "messages": messages,
+        "current_node": "agent_node",
+        "function_calls": state.get("function_calls", []) + calls,
+        "pending_function_calls": [],
+        "function_results": state.get("function_results", []) + results,
+        "traces": (state.get("traces") or []) + [trace]
+    }
+
 # Create and compile the graph
-def create_agent_graph():
+def create_agent_graph(streaming: bool = False):
     # Initialize the graph
     graph = StateGraph(AgentState)
     
     # Add nodes
     graph.add_node("user_node", user_node)
-    graph.add_node("agent_node", agent_node)
+    graph.add_node("agent_node", streaming_agent_node if streaming else agent_node)
     graph.add_node("function_node", function_node)
     
     # Add conditional edges
@@ -221,23 +390,43 @@ def create_agent_graph():
     return graph.compile()
 
 # Helper function to run the agent
-def run_agent(user_input: str):
-    agent = create_agent_graph()
+def run_agent(
+    user_input: str,
+    streaming: bool = False,
+    session_id: Optional[str] = None,
+    traces: Optional[List[Dict]] = None
+):
+    """Run one turn and return its AI messages.
+
+    Pass a list as traces to receive the streaming executor's per-turn timings.
+    """
+    agent = create_agent_graph(streaming=streaming)
+    
+    # Earlier turns are kept compactly in the session store between runs
+    messages = sessions.history(session_id) if session_id else []
+    previous = len(messages)
     
     # Initialize state
     state = {
-        "messages": [],
+        "messages": messages,
         "current_node": "user_node",
         "function_calls": [],
         "pending_function_calls": [],
-        "function_results": []
+        "function_results": [],
+        "traces": [],
+        "session_id": session_id
     }
     
     # Run the agent
     result = agent.invoke({"user_message": user_input, **state})
+    new_messages = result["messages"][previous:]
+    if traces is not None:
+        traces.extend(result.get("traces") or [])
+    if session_id:
+        sessions.extend(session_id, new_messages)
     
-    # Extract and return AI messages
-    return [msg for msg in result["messages"] if isinstance(msg, AIMessage)]
+    # Extract and return AI messages from this turn
+    return [msg for msg in new_messages if isinstance(msg, AIMessage)]
 
 if __name__ == "__main__":
     user_query = input("Enter your query: ")
@@ -1,7 +1,7 @@
 import os
 from typing import Dict, List, TypedDict, Optional
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from backends import get_chat_model
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.graph import StateGraph, END
@@ -47,7 +47,7 @@ def planner_node(state: Dict) -> Dict:
     ])
     
     # Set up the planner model
-    planner_model = ChatOpenAI(temperature=0)
+    planner_model = get_chat_model(temperature=0)
     
     # Get the last user message
     last_message = messages[-1].content
@@ -77,7 +77,7 @@ def executor_node(state: Dict) -> Dict:
     ])
     
     # Set up the executor model
-    executor_model = ChatOpenAI(temperature=0)
+    executor_model = get_chat_model(temperature=0)
     
     # Get the last user message
     last_message = messages[-1].content
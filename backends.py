@@ -0,0 +1,299 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+import openai
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+
+# Load environment variables
+load_dotenv()
+
+# Recent latencies kept per backend for the p95 estimate
+LATENCY_WINDOW = 200
+# Samples needed before p95 replaces the default hedge delay
+MIN_LATENCY_SAMPLES = 20
+
+class NoBackendAvailable(RuntimeError):
+    """Raised when every backend's circuit breaker is open."""
+
+def is_backend_failure(error: BaseException) -> bool:
+    """True for errors that say the backend is unhealthy, not that the request is bad.
+
+    Connection errors, timeouts, rate limits and 5xx responses count; client
+    errors such as a too-long context or bad auth would fail on every backend.
+    """
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return False
+
+class CircuitBreaker:
+    """Eject a backend after repeated failures and retry it after a cool-down."""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Closed and half-open breakers let requests through."""
+        return self.state != "open"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # A failed trial request in half-open state re-opens immediately
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+class Backend:
+    """One OpenAI-compatible endpoint with its latency history and breaker."""
+
+    def __init__(
+        self,
+        name: str,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def record_latency(self, seconds: float):
+        self.latencies.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        """95th percentile of recent latencies, or None with too few samples."""
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def chat_model(self, **kwargs) -> ChatOpenAI:
+        """Create a ChatOpenAI client pointed at this backend."""
+        if self.base_url:
+            kwargs["base_url"] = self.base_url
+        if self.api_key:
+            kwargs["api_key"] = self.api_key
+        if self.model:
+            kwargs["model"] = self.model
+        # Retries would hide failures from the breaker and delay failover
+        kwargs.setdefault("max_retries", 0)
+        return ChatOpenAI(**kwargs)
+
+class BackendPool:
+    """Ordered list of backends, primary first."""
+
+    def __init__(self, backends: List[Backend], default_hedge_delay: float = 2.0):
+        self.backends = backends
+        self.default_hedge_delay = default_hedge_delay
+
+    def available(self) -> List[Backend]:
+        return [backend for backend in self.backends if backend.breaker.allow()]
+
+    def hedge_delay(self, backend: Backend) -> float:
+        """How long to wait on a backend before sending a duplicate elsewhere."""
+        p95 = backend.p95()
+        return p95 if p95 is not None else self.default_hedge_delay
+
+def load_backends() -> List[Backend]:
+    """Read backends from MODEL_BACKENDS, a JSON list of
+    {"name", "base_url", "api_key", "model"} objects. Defaults to OpenAI only."""
+    failure_threshold = int(os.getenv("BREAKER_FAILURES", "3"))
+    reset_timeout = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+
+    configured = json.loads(os.getenv("MODEL_BACKENDS") or "[]") or [{"name": "openai"}]
+    backends = [
+        Backend(
+            name=entry.get("name", f"backend-{index}"),
+            base_url=entry.get("base_url"),
+            api_key=entry.get("api_key"),
+            model=entry.get("model"),
+            breaker=CircuitBreaker(failure_threshold, reset_timeout)
+        )
+        for index, entry in enumerate(configured)
+    ]
+    names = [backend.name for backend in backends]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"MODEL_BACKENDS names must be unique; repeated: {', '.join(duplicates)}")
+    return backends
+
+# Background event loop so sync callers can cancel in-flight requests
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="backends-loop", daemon=True).start()
+        return _loop
+
+class HedgedChatModel:
+    """Chat model that hedges slow requests across backends and skips broken ones.
+
+    A request goes to the first healthy backend. If it hasn't answered within
+    that backend's recent p95 latency, a duplicate goes to the next backend;
+    whichever answers first wins and the other is cancelled. Backend failures
+    (see is_backend_failure) move on to the next backend straight away; client
+    errors are raised as-is.
+    """
+
+    def __init__(self, pool: BackendPool, **model_kwargs):
+        self.pool = pool
+        # Keyed by the backend itself so two backends can never share a client
+        self.models: Dict[Backend, ChatOpenAI] = {
+            backend: backend.chat_model(**model_kwargs) for backend in pool.backends
+        }
+
+    async def _attempt(self, backend: Backend, input: Any, config: Optional[Dict], **kwargs):
+        started = time.perf_counter()
+        try:
+            result = await self.models[backend].ainvoke(input, config, **kwargs)
+        except asyncio.CancelledError:
+            # Losing a hedge race says nothing about the backend's health, but
+            # the time so far is a lower bound on its latency. Without it the
+            # p95 would miss the slow tail and the hedge delay would drift down.
+            backend.record_latency(time.perf_counter() - started)
+            raise
+        except Exception as e:
+            if is_backend_failure(e):
+                backend.breaker.record_failure()
+            raise
+        backend.record_latency(time.perf_counter() - started)
+        backend.breaker.record_success()
+        return result
+
+    async def ainvoke(self, input: Any, config: Optional[Dict] = None, **kwargs):
+        remaining = self.pool.available()
+        if not remaining:
+            raise NoBackendAvailable("All model backends are currently unavailable.")
+
+        pending: Dict[asyncio.Task, Backend] = {}
+        last_error: Optional[BaseException] = None
+
+        def launch():
+            backend = remaining.pop(0)
+            task = asyncio.ensure_future(self._attempt(backend, input, config, **kwargs))
+            pending[task] = backend
+            return backend
+
+        leader = launch()
+        try:
+            while pending:
+                timeout = self.pool.hedge_delay(leader) if remaining else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Too slow: hedge with the next backend
+                    leader = launch()
+                    continue
+
+                for task in done:
+                    pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    # A bad request would fail the same way everywhere
+                    if not is_backend_failure(last_error):
+                        raise last_error
+
+                # Everything in flight failed; fail over
+                if not pending and remaining:
+                    leader = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error
+
+    def invoke(self, input: Any, config: Optional[Dict] = None, **kwargs):
+        future = asyncio.run_coroutine_threadsafe(
+            self.ainvoke(input, config, **kwargs), _event_loop()
+        )
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def stream(self, input: Any, config: Optional[Dict] = None, **kwargs) -> Iterator[Any]:
+        """Stream from the first healthy backend, failing over before the first chunk."""
+        last_error: Optional[Exception] = None
+        for backend in self.pool.available():
+            first_chunk = True
+            try:
+                # Stream latency isn't recorded: it would skew the invoke p95
+                for chunk in self.models[backend].stream(input, config, **kwargs):
+                    first_chunk = False
+                    yield chunk
+            except Exception as e:
+                if not is_backend_failure(e):
+                    raise
+                backend.breaker.record_failure()
+                if not first_chunk:
+                    # Output already reached the caller; can't switch backends now
+                    raise
+                last_error = e
+                continue
+            backend.breaker.record_success()
+            return
+
+        if last_error is not None:
+            raise last_error
+        raise NoBackendAvailable("All model backends are currently unavailable.")
+
+# Shared so latency history and breaker state survive across calls
+_pool: Optional[BackendPool] = None
+
+def get_pool() -> BackendPool:
+    global _pool
+    if _pool is None:
+        _pool = BackendPool(
+            load_backends(),
+            default_hedge_delay=float(os.getenv("HEDGE_DELAY_SECONDS", "2.0"))
+        )
+    return _pool
+
+def get_chat_model(**kwargs):
+    """Return a chat model for the configured backends.
+
+    With a single backend this is a plain ChatOpenAI using that backend's
+    base_url, api_key and model; with nothing configured that is the same
+    ChatOpenAI as before.
+    """
+    pool = get_pool()
+    if len(pool.backends) == 1:
+        # No other backend to fail over to, so keep ChatOpenAI's own retries
+        kwargs.setdefault("max_retries", 2)
+        return pool.backends[0].chat_model(**kwargs)
+    return HedgedChatModel(pool, **kwargs)
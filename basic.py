@@ -1,8 +1,9 @@
 from typing import Dict, TypedDict, List, Optional
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage, AIMessage
-from langchain_openai import ChatOpenAI
+from backends import get_chat_model
 from langgraph.graph import StateGraph, END
+from linear_executor import compile_linear
 
 # Load environment variables
 load_dotenv()
@@ -15,14 +16,14 @@ class ChatState(TypedDict):
 def respond(state: ChatState) -> ChatState:
     """Generate a response from the chatbot."""
     messages = state["messages"]
-    model = ChatOpenAI(temperature=0)
+    model = get_chat_model(temperature=0)
     response = model.invoke(messages)
     messages.append(response)
     return {"messages": messages}
 
 # Build the graph
-def create_chat_graph():
-    """Create a simple graph with one node that responds to the user."""
+def build_chat_workflow() -> StateGraph:
+    """Build the uncompiled single-node workflow."""
     workflow = StateGraph(ChatState)
     
     # Add node
@@ -34,6 +35,17 @@ def create_chat_graph():
     # Add edge to END
     workflow.add_edge("respond", END)
     
+    return workflow
+
+def create_chat_graph(fast: bool = False):
+    """Create a simple graph with one node that responds to the user.
+
+    With fast=True the node runs directly, skipping LangGraph's compiled runtime.
+    """
+    workflow = build_chat_workflow()
+    if fast:
+        return compile_linear(workflow)
+    
     # Compile
     return workflow.compile()
 
@@ -0,0 +1,114 @@
+import json
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# Appended to the task's system prompt when several items share one call
+BATCH_INSTRUCTIONS = (
+    "You will receive several numbered requests, one JSON object per line. "
+    "Handle each one independently, exactly as you would on its own. "
+    'Reply with JSON only, in the form {"results": [{"id": 1, "output": "..."}]}, '
+    "with one result per request id."
+)
+
+def format_batch_items(contents: List[str]) -> str:
+    """One JSON line per item so ids and content can't be confused."""
+    return "\n".join(
+        json.dumps({"id": number, "request": content}) for number, content in enumerate(contents, 1)
+    )
+
+def parse_batch_outputs(text: str, count: int) -> List[Optional[str]]:
+    """Return each item's output in order, or None where it is missing or invalid."""
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [None] * count
+
+    results = data.get("results") if isinstance(data, dict) else data
+    outputs: Dict[int, str] = {}
+    if isinstance(results, list):
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+            number, output = result.get("id"), result.get("output")
+            if isinstance(number, int) and isinstance(output, str) and output.strip():
+                outputs[number] = output.strip()
+
+    return [outputs.get(number) for number in range(1, count + 1)]
+
+class MicroBatcher:
+    """Collect compatible requests for a short window and send them as one call.
+
+    run_batch(key, contents) returns one output per item, None for items that
+    failed; those, and batches of one, go through run_single(key, content).
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[Hashable, List[Any]], List[Optional[str]]],
+        run_single: Callable[[Hashable, Any], str],
+        window_seconds: float = 0.01,
+        max_batch_size: int = 8,
+        max_workers: int = 8
+    ):
+        self.run_batch = run_batch
+        self.run_single = run_single
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[Hashable, List[Tuple[Any, Future]]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="micro-batch")
+
+    def submit(self, key: Hashable, content: Any) -> Any:
+        """Queue content under key and block until its output is ready."""
+        future: Future = Future()
+        full = None
+
+        with self._lock:
+            batch = self._pending.setdefault(key, [])
+            batch.append((content, future))
+            if len(batch) == 1:
+                timer = threading.Timer(self.window_seconds, self._flush, (key, batch))
+                timer.daemon = True
+                timer.start()
+            if len(batch) >= self.max_batch_size:
+                del self._pending[key]
+                full = batch
+
+        if full is not None:
+            self._executor.submit(self._run, key, full)
+        return future.result()
+
+    def _flush(self, key: Hashable, batch: List[Tuple[Any, Future]]):
+        with self._lock:
+            # Already sent because it filled up
+            if self._pending.get(key) is not batch:
+                return
+            del self._pending[key]
+        # Keep the timer thread short-lived; the model call runs on the pool
+        self._executor.submit(self._run, key, batch)
+
+    def _run(self, key: Hashable, batch: List[Tuple[Any, Future]]):
+        if len(batch) == 1:
+            outputs: List[Optional[str]] = [None]
+        else:
+            try:
+                outputs = self.run_batch(key, [content for content, _ in batch])
+            except Exception:
+                outputs = [None] * len(batch)
+            if len(outputs) != len(batch):
+                outputs = [None] * len(batch)
+
+        for (content, future), output in zip(batch, outputs):
+            if output is None:
+                self._executor.submit(self._run_single, key, content, future)
+            else:
+                future.set_result(output)
+
+    def _run_single(self, key: Hashable, content: Any, future: Future):
+        try:
+            future.set_result(self.run_single(key, content))
+        except Exception as e:
+            future.set_exception(e)
@@ -0,0 +1,80 @@
+"""Exercise hedged requests and circuit breaking against two local stub backends.
+
+Run from the repository root (no API key needed):
+
+    python benchmarks/bench_backends.py
+
+The primary is fast but occasionally very slow; the fallback is slower but
+steady. Latency percentiles are reported for the primary alone and for the
+hedged pair, then the primary is made to fail to show the breaker ejecting it.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage
+
+from backends import Backend, BackendPool, CircuitBreaker, HedgedChatModel
+from stub_backend import StubProfile, start_stub_backend
+
+REQUESTS = 200
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(fraction * (len(ordered) - 1))]
+
+def backend_for(server, name: str) -> Backend:
+    return Backend(
+        name,
+        base_url=f"http://127.0.0.1:{server.server_port}/v1",
+        api_key="stub",
+        breaker=CircuitBreaker(failure_threshold=3, reset_timeout=5.0)
+    )
+
+def run(model: HedgedChatModel, count: int = REQUESTS):
+    """Send requests one at a time; return latencies and which backend answered."""
+    latencies, winners = [], {}
+    for _ in range(count):
+        started = time.perf_counter()
+        response = model.invoke([HumanMessage(content="ping")])
+        latencies.append(time.perf_counter() - started)
+        winners[response.content] = winners.get(response.content, 0) + 1
+    return latencies, winners
+
+def report(label: str, latencies, winners):
+    print(
+        f"{label:<16} p50={percentile(latencies, 0.50) * 1000:7.1f}ms "
+        f"p95={percentile(latencies, 0.95) * 1000:7.1f}ms "
+        f"p99={percentile(latencies, 0.99) * 1000:7.1f}ms  {winners}"
+    )
+
+def main():
+    primary_profile = StubProfile("primary", latency=0.05, slow_rate=0.05, slow_latency=2.0)
+    fallback_profile = StubProfile("fallback", latency=0.15)
+    primary_server = start_stub_backend(primary_profile)
+    fallback_server = start_stub_backend(fallback_profile)
+
+    single = HedgedChatModel(
+        BackendPool([backend_for(primary_server, "primary")], default_hedge_delay=0.5)
+    )
+    report("primary only", *run(single))
+
+    hedged = HedgedChatModel(
+        BackendPool(
+            [backend_for(primary_server, "primary"), backend_for(fallback_server, "fallback")],
+            default_hedge_delay=0.5
+        )
+    )
+    report("hedged", *run(hedged))
+
+    # Break the primary and watch the breaker take it out of rotation
+    primary_profile.failure_rate = 1.0
+    latencies, winners = run(hedged, 20)
+    report("primary failing", latencies, winners)
+    primary = hedged.pool.backends[0]
+    print(f"primary breaker state: {primary.breaker.state} after {primary.breaker.failures} failures")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare full email generation against template-plus-delta drafting.
+
+Run from the repository root with OPENAI_API_KEY set:
+
+    python benchmarks/bench_email_drafting.py
+
+For each email type this reports model output tokens, time until the first
+text can be shown, and total latency for both modes.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tiktoken
+
+from email_templates import EMAIL_TEMPLATES, split_template
+from psych_assistant import process_task, stream_email_delta
+
+DETAILS = (
+    "Client is a 34-year-old teacher experiencing work-related anxiety and poor sleep "
+    "over the last three months. Prefers evening sessions, first appointment is Tuesday at 6pm."
+)
+
+encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+
+def count_tokens(text: str) -> int:
+    return len(encoding.encode(text))
+
+def run_full(email_type: str):
+    """Generate the whole email with one model call."""
+    state = {"task": "2", "email_type": email_type, "details": DETAILS}
+    started = time.perf_counter()
+    result = process_task(state)["result"]
+    elapsed = time.perf_counter() - started
+    # Nothing is shown until the full response arrives
+    return count_tokens(result), elapsed, elapsed
+
+def run_template(email_type: str):
+    """Fill the template locally and generate only the personalized part."""
+    state = {"task": "2", "email_type": email_type, "details": DETAILS}
+    started = time.perf_counter()
+    split_template(email_type)
+    first_visible = time.perf_counter() - started
+    delta = "".join(stream_email_delta(state))
+    elapsed = time.perf_counter() - started
+    return count_tokens(delta), first_visible, elapsed
+
+def main():
+    print(f"{'email_type':<13}{'mode':<10}{'out tokens':>11}{'first text s':>14}{'total s':>10}")
+    for email_type in EMAIL_TEMPLATES:
+        for mode, run in (("full", run_full), ("template", run_template)):
+            tokens, first_visible, elapsed = run(email_type)
+            print(f"{email_type:<13}{mode:<10}{tokens:>11}{first_visible:>14.2f}{elapsed:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compare invocations per second of compiled graphs against the linear executor.
+
+Run from the repository root:
+
+    python benchmarks/bench_linear_graphs.py
+
+The chat graphs use a fake chat model so only graph overhead is measured.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+
+import basic
+import direct_agent
+import echo_agent
+
+# Keep model cost out of the measurement
+def fake_model(**kwargs):
+    return FakeListChatModel(responses=["ok"])
+
+basic.get_chat_model = fake_model
+direct_agent.get_chat_model = fake_model
+
+def invocations_per_second(graph, make_state, seconds: float = 1.0) -> float:
+    """Invoke the graph repeatedly for roughly the given duration."""
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        graph.invoke(make_state())
+        count += 1
+    return count / (time.perf_counter() - started)
+
+CASES = [
+    ("echo_agent", echo_agent.create_echo_graph,
+     lambda: {"input": "hello", "output": None}),
+    ("basic", basic.create_chat_graph,
+     lambda: {"messages": [HumanMessage(content="hello")]}),
+    ("direct_agent", direct_agent.create_chat_graph,
+     lambda: {"messages": [], "user_message": "hello"}),
+]
+
+def main():
+    print(f"{'graph':<14}{'compiled/s':>14}{'fast/s':>14}{'speedup':>10}")
+    for name, create_graph, make_state in CASES:
+        compiled = invocations_per_second(create_graph(), make_state)
+        fast = invocations_per_second(create_graph(fast=True), make_state)
+        print(f"{name:<14}{compiled:>14.0f}{fast:>14.0f}{fast / compiled:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Measure memory per session and per message, LangChain lists vs. SessionStore.
+
+Run from the repository root:
+
+    python benchmarks/bench_session_memory.py [SESSIONS ...]
+
+Defaults to 1k, 10k and 50k sessions. Each session holds a system prompt and
+three user/assistant turns, with a mix of repeated and unique text.
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from session_store import SessionStore
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant with access to tools. When asked a question, determine if "
+    "you need to use a tool. If you need to use a tool, call the appropriate function."
+)
+COMMON_REQUESTS = ["Thanks!", "Can you make it shorter?", "Use a warmer tone.", "What about CBT?"]
+TURNS = 3
+
+def turns(session: int):
+    """(user, assistant) text for each turn; user text often repeats across sessions."""
+    for turn in range(TURNS):
+        user = COMMON_REQUESTS[(session + turn) % len(COMMON_REQUESTS)] if turn else \
+            f"Write a short note about sleep hygiene for client {session}."
+        assistant = f"Here is a draft for client {session}, turn {turn}: " + "Sleep matters. " * 12
+        yield user, assistant
+
+def build_langchain(count: int):
+    """Before: every session holds full message objects and its own system prompt."""
+    store = {}
+    for session in range(count):
+        messages = [SystemMessage(content=SYSTEM_PROMPT)]
+        for user, assistant in turns(session):
+            messages.append(HumanMessage(content=user))
+            messages.append(AIMessage(content=assistant))
+        store[f"session-{session}"] = messages
+    return store
+
+def build_compact(count: int):
+    """After: slot records and one interned system prompt."""
+    store = SessionStore(max_sessions=None, idle_seconds=None)
+    for session in range(count):
+        session_id = f"session-{session}"
+        messages = [SystemMessage(content=SYSTEM_PROMPT)]
+        for user, assistant in turns(session):
+            messages.append(HumanMessage(content=user))
+            messages.append(AIMessage(content=assistant))
+        store.extend(session_id, messages)
+    return store
+
+def measure(build, count: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    store = build(count)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return current
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+    messages_per_session = 1 + 2 * TURNS
+
+    print(f"{'sessions':>9}{'path':>11}{'total MB':>11}{'B/session':>11}{'B/message':>11}")
+    for count in counts:
+        for label, build in (("before", build_langchain), ("after", build_compact)):
+            total = measure(build, count)
+            print(
+                f"{count:>9}{label:>11}{total / 1e6:>11.1f}"
+                f"{total / count:>11.0f}{total / (count * messages_per_session):>11.0f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Measure per-turn tool setup with many registered tools.
+
+Run from the repository root:
+
+    python benchmarks/bench_tool_registry.py
+
+Compares rebuilding tool lists and schemas on every turn (the old agent_node
+behaviour) against the cached ToolRegistry, and shows that lazily registered
+tools cost nothing until they are first called.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.tools import StructuredTool
+
+from tool_registry import ToolRegistry
+
+TOOL_COUNT = 60
+TURNS = 2000
+
+def make_tool(number: int) -> StructuredTool:
+    def run(query: str, limit: int = 5) -> str:
+        return f"tool {number}: {query} ({limit})"
+    return StructuredTool.from_function(run, name=f"tool_{number}", description=f"Synthetic tool {number}.")
+
+def per_turn_rebuild(tools):
+    """What each turn used to do: rebuild the tool list and every schema."""
+    available_tools = {tool.name: tool for tool in tools}
+    schemas = [
+        {
+            "type": "function",
+            "function": {
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": tool.args_schema.schema()
+            }
+        }
+        for tool in available_tools.values()
+    ]
+    return available_tools, schemas
+
+def per_turn_registry(registry: ToolRegistry):
+    """What each turn does now."""
+    return registry.schemas(), registry.get("tool_0")
+
+def time_per_turn(fn, *args) -> float:
+    started = time.perf_counter()
+    for _ in range(TURNS):
+        fn(*args)
+    return (time.perf_counter() - started) / TURNS * 1e6
+
+def main():
+    tools = [make_tool(number) for number in range(TOOL_COUNT)]
+
+    started = time.perf_counter()
+    registry = ToolRegistry()
+    for tool in tools:
+        registry.register(tool)
+    eager_ms = (time.perf_counter() - started) * 1000
+
+    # Lazy tools: nothing is imported until the first call
+    parameters = {"type": "object", "properties": {"obj": {"type": "object"}}, "required": ["obj"]}
+    started = time.perf_counter()
+    lazy = ToolRegistry()
+    for number in range(TOOL_COUNT):
+        lazy.register_lazy(f"lazy_{number}", "json:dumps", "Serialize an object.", parameters)
+    lazy_ms = (time.perf_counter() - started) * 1000
+
+    print(f"{TOOL_COUNT} tools")
+    print(f"register eager:           {eager_ms:8.2f} ms (once)")
+    print(f"register lazy:            {lazy_ms:8.2f} ms (once, loaded={lazy.get('lazy_0').loaded})")
+    print(f"per-turn rebuild:         {time_per_turn(per_turn_rebuild, tools):8.1f} us")
+    print(f"per-turn cached registry: {time_per_turn(per_turn_registry, registry):8.1f} us")
+
+    tool = registry.get("tool_0")
+    started = time.perf_counter()
+    for _ in range(TURNS):
+        tool.validate({"query": "anxiety", "limit": 3})
+    print(f"argument validation:      {(time.perf_counter() - started) / TURNS * 1e6:8.2f} us")
+
+if __name__ == "__main__":
+    main()
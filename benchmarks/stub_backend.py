@@ -0,0 +1,100 @@
+"""Local OpenAI-compatible stub server with a configurable latency profile.
+
+Run standalone:
+
+    python benchmarks/stub_backend.py --port 8001 --latency 0.05 --slow-rate 0.05 --slow-latency 2
+
+or start it from another script with start_stub_backend(...).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubProfile:
+    """Latency and failure behaviour of a stub backend."""
+
+    def __init__(
+        self,
+        name: str,
+        latency: float = 0.05,
+        slow_rate: float = 0.0,
+        slow_latency: float = 2.0,
+        failure_rate: float = 0.0
+    ):
+        self.name = name
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.failure_rate = failure_rate
+
+def _make_handler(profile: StubProfile):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: dict):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+
+            slow = random.random() < profile.slow_rate
+            time.sleep(profile.slow_latency if slow else profile.latency)
+
+            if random.random() < profile.failure_rate:
+                self._send(500, {"error": {"message": "stub failure", "type": "server_error"}})
+                return
+
+            content = f"reply from {profile.name}"
+            self._send(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 4, "total_tokens": 14}
+            })
+
+    return Handler
+
+def start_stub_backend(profile: StubProfile, port: int = 0) -> ThreadingHTTPServer:
+    """Start a stub server in a daemon thread; its base URL is http://127.0.0.1:<port>/v1."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(profile))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--name", default="stub")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    profile = StubProfile(args.name, args.latency, args.slow_rate, args.slow_latency, args.failure_rate)
+    server = start_stub_backend(profile, args.port)
+    print(f"Stub backend {args.name} on http://127.0.0.1:{server.server_port}/v1")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
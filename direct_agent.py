@@ -1,8 +1,10 @@
 from typing import Dict, TypedDict, List
 from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import HumanMessage, AIMessage
+from backends import get_chat_model
 from langgraph.graph import StateGraph, END
+from linear_executor import compile_linear
+from session_store import system_message
 
 # Load environment variables
 load_dotenv()
@@ -11,6 +13,14 @@ load_dotenv()
 class ChatState(TypedDict):
     messages: List
     
+# One system message shared by every call
+DIRECT_SYSTEM_MESSAGE = system_message("""
+    You are a helpful, intelligent AI assistant specialized in creating professional content.
+    When asked to build content, create something specific, detailed, and tailored to the 
+    exact request. If asked about psychologist content, focus on mental health expertise, 
+    professional credentials, and compassionate care.
+    """)
+
 # Define node
 def respond(state: Dict) -> Dict:
     """Generate a response from the chatbot."""
@@ -24,20 +34,14 @@ def respond(state: Dict) -> Dict:
     messages = []
     
     # Add system message
-    system_message = SystemMessage(content="""
-    You are a helpful, intelligent AI assistant specialized in creating professional content.
-    When asked to build content, create something specific, detailed, and tailored to the 
-    exact request. If asked about psychologist content, focus on mental health expertise, 
-    professional credentials, and compassionate care.
-    """)
-    messages.append(system_message)
+    messages.append(DIRECT_SYSTEM_MESSAGE)
     
     # Add user message
     if user_message:
         messages.append(HumanMessage(content=user_message))
     
     # Set up the model
-    model = ChatOpenAI(temperature=0.7)
+    model = get_chat_model(temperature=0.7)
     
     # Generate response
     response = model.invoke(messages)
@@ -49,8 +53,8 @@ def respond(state: Dict) -> Dict:
     return {"messages": messages}
 
 # Build the graph
-def create_chat_graph():
-    """Create a simple graph with one node that responds to the user."""
+def build_chat_workflow() -> StateGraph:
+    """Build the uncompiled single-node workflow."""
     workflow = StateGraph(ChatState)
     
     # Add node
@@ -62,6 +66,17 @@ def create_chat_graph():
     # Add edge to END
     workflow.add_edge("respond", END)
     
+    return workflow
+
+def create_chat_graph(fast: bool = False):
+    """Create a simple graph with one node that responds to the user.
+
+    With fast=True the node runs directly, skipping LangGraph's compiled runtime.
+    """
+    workflow = build_chat_workflow()
+    if fast:
+        return compile_linear(workflow)
+    
     # Compile
     return workflow.compile()
 
@@ -1,5 +1,6 @@
 from typing import Dict, TypedDict, List, Optional
 from langgraph.graph import StateGraph, END
+from linear_executor import compile_linear
 
 # Define state
 class EchoState(TypedDict):
@@ -12,8 +13,8 @@ def echo(state: EchoState) -> EchoState:
     return {"input": state["input"], "output": f"Echo: {state['input']}"}
 
 # Build the graph
-def create_echo_graph():
-    """Create a simple graph with one node that echoes the input."""
+def build_echo_workflow() -> StateGraph:
+    """Build the uncompiled single-node workflow."""
     workflow = StateGraph(EchoState)
     
     # Add node
@@ -25,6 +26,17 @@ def create_echo_graph():
     # Add edge to END
     workflow.add_edge("echo", END)
     
+    return workflow
+
+def create_echo_graph(fast: bool = False):
+    """Create a simple graph with one node that echoes the input.
+
+    With fast=True the node runs directly, skipping LangGraph's compiled runtime.
+    """
+    workflow = build_echo_workflow()
+    if fast:
+        return compile_linear(workflow)
+    
     # Compile
     return workflow.compile()
 
@@ -0,0 +1,82 @@
+from typing import Dict, Tuple
+
+# Marker where the model-written paragraphs are inserted
+PERSONALIZED = "{personalized}"
+
+# One template per email_type; everything except the marker is sent as-is
+EMAIL_TEMPLATES: Dict[str, str] = {
+    "intake": """Subject: Welcome and Next Steps for Your First Session
+
+Dear [Client Name],
+
+Thank you for reaching out. Taking the first step toward support is meaningful, and I'm glad you contacted my practice.
+
+{personalized}
+
+Before our first session, please complete the intake forms I'll send separately and bring a list of any current medications. Our first meeting is an opportunity for us to get to know each other, talk about what brings you in, and discuss your goals for therapy. Everything you share is confidential, within the limits we'll review together.
+
+If you have any questions or need to reschedule, please don't hesitate to contact me.
+
+Warm regards,
+
+[Your Name]
+[Credentials]
+[Practice Name] | [Phone] | [Email]
+""",
+    "follow-up": """Subject: Following Up on Our Recent Session
+
+Dear [Client Name],
+
+I hope this message finds you well. I wanted to follow up on our recent session.
+
+{personalized}
+
+Please remember that progress isn't always linear, and it's okay to have difficult days. If anything comes up before our next appointment, or if you'd like to adjust our schedule, feel free to reach out.
+
+Warm regards,
+
+[Your Name]
+[Credentials]
+[Practice Name] | [Phone] | [Email]
+""",
+    "referral": """Subject: Referral for Continued Support
+
+Dear [Client Name],
+
+Thank you for the trust you've placed in me during our work together. I'm writing to share a referral that I believe will support your continued care.
+
+{personalized}
+
+With your written consent, I'm happy to coordinate with the new provider to ensure a smooth transition. Please let me know if you have any questions or concerns about this recommendation; I'm glad to talk it through with you.
+
+Warm regards,
+
+[Your Name]
+[Credentials]
+[Practice Name] | [Phone] | [Email]
+""",
+    "termination": """Subject: Concluding Our Work Together
+
+Dear [Client Name],
+
+I'm writing to follow up on our conversation about concluding our therapeutic work together.
+
+{personalized}
+
+Please know that the door remains open. If you ever wish to return to therapy or need a referral in the future, you are welcome to contact me. If you are ever in crisis, please call 988 or go to your nearest emergency room.
+
+I wish you all the best.
+
+Warm regards,
+
+[Your Name]
+[Credentials]
+[Practice Name] | [Phone] | [Email]
+""",
+}
+
+def split_template(email_type: str) -> Tuple[str, str]:
+    """Return the fixed text before and after the personalized paragraphs."""
+    template = EMAIL_TEMPLATES.get(email_type, EMAIL_TEMPLATES["intake"])
+    head, tail = template.split(PERSONALIZED, 1)
+    return head, tail
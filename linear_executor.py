@@ -0,0 +1,119 @@
+import inspect
+from typing import Any, Callable, Dict, List, Optional, Annotated, get_origin, get_type_hints
+from langgraph.graph import StateGraph, END
+
+# LangGraph's implicit start node name
+START = "__start__"
+
+def _entry_point(workflow: StateGraph) -> Optional[str]:
+    """Find the node the workflow starts at."""
+    entry = getattr(workflow, "entry_point", None)
+    if entry:
+        return entry
+
+    # Newer LangGraph records the entry point as an edge from START
+    for source, target in workflow.edges:
+        if source == START:
+            return target
+    return None
+
+def _node_function(node: Any) -> Callable:
+    """Unwrap the plain function LangGraph stored for a node."""
+    runnable = getattr(node, "runnable", node)
+    func = getattr(runnable, "func", None)
+    return func if callable(func) else runnable.invoke
+
+def _accepts_config(function: Callable) -> bool:
+    """Whether LangGraph would pass config to this node function."""
+    try:
+        return "config" in inspect.signature(function).parameters
+    except (TypeError, ValueError):
+        return False
+
+def _state_channels(workflow: StateGraph) -> Optional[List[str]]:
+    """Return the state keys, or None if any key has a reducer."""
+    schema = getattr(workflow, "schema", None)
+    if schema is None:
+        return None
+
+    hints = get_type_hints(schema, include_extras=True)
+
+    # Annotated keys carry reducers, which only the compiled graph applies
+    if any(get_origin(hint) is Annotated for hint in hints.values()):
+        return None
+    return list(hints)
+
+def linear_path(workflow: StateGraph) -> Optional[List[str]]:
+    """Return the node order if the workflow is a plain chain, otherwise None."""
+    if any(getattr(workflow, "branches", {}).values()):
+        return None
+    if getattr(workflow, "waiting_edges", None):
+        return None
+
+    entry = _entry_point(workflow)
+    if entry is None:
+        return None
+
+    # Every node may have at most one outgoing edge
+    successors = {}
+    for source, target in workflow.edges:
+        if source == START:
+            continue
+        if source in successors:
+            return None
+        successors[source] = target
+
+    finish_point = getattr(workflow, "finish_point", None)
+    path = []
+    node = entry
+    while node != END:
+        if node in path or node not in workflow.nodes:
+            return None
+        path.append(node)
+        node = successors.get(node, END if node == finish_point else None)
+        if node is None:
+            return None
+
+    # Nodes that are never reached mean this isn't the graph we think it is
+    if len(path) != len(workflow.nodes):
+        return None
+    return path
+
+class LinearExecutor:
+    """Run a linear workflow's node functions directly, like compile().invoke()."""
+
+    def __init__(self, functions: List[Callable], channels: List[str]):
+        self.functions = functions
+        self.channels = channels
+        # Checked once here rather than on every invoke
+        self._wants_config = [_accepts_config(function) for function in functions]
+
+    def invoke(self, input: Dict, config: Optional[Dict] = None) -> Dict:
+        """Run every node in order, keeping only keys declared on the state.
+
+        Nodes that declare a config parameter receive config, as in LangGraph.
+        """
+        values = {key: value for key, value in input.items() if key in self.channels}
+        config = config or {}
+
+        for function, wants_config in zip(self.functions, self._wants_config):
+            if wants_config:
+                update = function(dict(values), config=config)
+            else:
+                update = function(dict(values))
+            if update:
+                values.update(
+                    {key: value for key, value in update.items() if key in self.channels}
+                )
+
+        return values
+
+def compile_linear(workflow: StateGraph):
+    """Return a LinearExecutor for linear workflows, or the compiled graph otherwise."""
+    path = linear_path(workflow)
+    channels = _state_channels(workflow)
+    if path is None or channels is None:
+        return workflow.compile()
+
+    functions = [_node_function(workflow.nodes[name]) for name in path]
+    return LinearExecutor(functions, channels)
@@ -1,7 +1,14 @@
-from typing import Dict, Any, List, Optional
+import os
+import threading
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import HumanMessage, AIMessage
+from backends import get_chat_model
+from batching import BATCH_INSTRUCTIONS, MicroBatcher, format_batch_items, parse_batch_outputs
+from email_templates import split_template
+from session_store import system_message
+from revisions import EditError, apply_edits, number_paragraphs, parse_edits, split_paragraphs
+from usage import UsageCallbackHandler, UsageLedger, estimate_tokens, ledger, record_batch_usage, usage_config
 
 # Load environment variables
 load_dotenv()
@@ -9,53 +16,216 @@ load_dotenv()
 # Define a simple state type
 StateType = Dict[str, Any]
 
+# Task number to task type, used for usage accounting
+TASK_TYPES = {'1': "content", '2': "email", '3': "research"}
+
+# Short outputs that may share a model call when micro-batching is enabled
+BATCHABLE_CONTENT_TYPES = {"Social media post"}
+
 def create_messages(task_type: str, content: str, **kwargs) -> List[Any]:
     """Create messages based on task type"""
     if task_type == "content":
         return [
-            SystemMessage(content=f"You are a professional content writer for psychologists. Create {kwargs.get('content_type', 'LinkedIn post')} content that is engaging, credible, and tailored for mental health professionals. Be specific and use a warm, expert tone."),
+            system_message(f"You are a professional content writer for psychologists. Create {kwargs.get('content_type', 'LinkedIn post')} content that is engaging, credible, and tailored for mental health professionals. Be specific and use a warm, expert tone."),
             HumanMessage(content=f"Topic: {content}")
         ]
     elif task_type == "email":
         return [
-            SystemMessage(content=f"You are an expert psychologist writing a {kwargs.get('email_type', 'intake')} email to a client. Be clear, compassionate, and professional. Use a warm, supportive tone."),
+            system_message(f"You are an expert psychologist writing a {kwargs.get('email_type', 'intake')} email to a client. Be clear, compassionate, and professional. Use a warm, supportive tone."),
+            HumanMessage(content=f"Details: {content}")
+        ]
+    elif task_type == "email_delta":
+        return [
+            system_message(f"You are an expert psychologist writing a {kwargs.get('email_type', 'intake')} email to a client. The greeting, standard paragraphs and sign-off are already written. Write only one or two short personalized paragraphs based on the details provided. Do not include a subject line, greeting or sign-off. Be clear, compassionate, and professional."),
             HumanMessage(content=f"Details: {content}")
         ]
+    elif task_type == "revision":
+        return [
+            system_message('You are an editor revising a draft for a psychologist. The draft\'s paragraphs are numbered. Apply the instruction with the fewest, most targeted edits. Reply with JSON only, in the form {"edits": [{"op": "replace", "paragraph": 2, "text": "new paragraph"}, {"op": "delete", "paragraph": 4}, {"op": "insert_after", "paragraph": 1, "text": "new paragraph"}]}. Use insert_after with paragraph 0 to add at the top. Do not repeat paragraphs you are not changing.'),
+            HumanMessage(content=f"Instruction: {kwargs.get('instruction', '')}\n\nDraft:\n{content}")
+        ]
+    elif task_type == "rewrite":
+        return [
+            system_message("You are an editor revising a draft for a psychologist. Apply the instruction and return the full revised draft only."),
+            HumanMessage(content=f"Instruction: {kwargs.get('instruction', '')}\n\nDraft:\n{content}")
+        ]
     else:  # research
         return [
-            SystemMessage(content="You are a research assistant for a psychologist. Summarize the latest research and best practices on the given topic. Be concise, evidence-based, and cite reputable sources if possible."),
+            system_message("You are a research assistant for a psychologist. Summarize the latest research and best practices on the given topic. Be concise, evidence-based, and cite reputable sources if possible."),
             HumanMessage(content=f"Topic: {content}")
         ]
 
+def prepare_usage(state: StateType, task_type: Optional[str] = None) -> Dict[str, Any]:
+    """Pre-flight the inputs, check budgets and return the usage-tracking config"""
+    session = state.get("session_id")
+    user = state.get("user_id") or session
+    
+    # Trim or reject oversized inputs before any network call
+    for key in ("topic", "details", "instruction"):
+        if state.get(key):
+            state[key] = ledger.preflight(state[key])
+    
+    estimated = sum(
+        estimate_tokens(state.get(key) or "") for key in ("topic", "details", "instruction", "draft")
+    )
+    ledger.check_budget(user, estimated)
+    
+    return usage_config(
+        "psych_assistant",
+        task_type=task_type or TASK_TYPES.get(state.get('task')),
+        model="gpt-3.5-turbo",
+        session=session,
+        user=user
+    )
+
+def stream_email_delta(state: StateType, config: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """Stream only the model-written paragraphs of a templated email"""
+    if config is None:
+        config = prepare_usage(state)
+    messages = create_messages(
+        "email_delta",
+        state.get("details", ""),
+        email_type=state.get("email_type", "intake")
+    )
+    model = get_chat_model(temperature=0.5, model="gpt-3.5-turbo", max_tokens=300)
+    for chunk in model.stream(messages, config=config):
+        yield chunk.content
+
+def stream_template_email(state: StateType, config: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """Stream a templated email: fixed text first, then the personalized part"""
+    # Checked before anything is shown, so a rejected input shows no partial email
+    if config is None:
+        config = prepare_usage(state)
+    head, tail = split_template(state.get("email_type", "intake"))
+    yield head
+    yield from stream_email_delta(state, config)
+    yield tail
+
+# Batch key: (task type, content type, model, temperature)
+BatchKey = Tuple[str, Optional[str], str, float]
+
+def _run_single(key: BatchKey, item: Tuple[str, Dict[str, Any]]) -> str:
+    """Generate one item on its own, with the caller's usage config"""
+    task_type, content_type, model_name, temperature = key
+    content, config = item
+    messages = create_messages(task_type, content, content_type=content_type)
+    model = get_chat_model(temperature=temperature, model=model_name)
+    return model.invoke(messages, config=config).content
+
+def _run_batch(key: BatchKey, items: List[Tuple[str, Dict[str, Any]]]) -> List[Optional[str]]:
+    """Generate several items with one call, sending the system prompt once"""
+    task_type, content_type, model_name, temperature = key
+    task_prompt = create_messages(task_type, "", content_type=content_type)[0].content
+    messages = [
+        system_message(f"{task_prompt}\n\n{BATCH_INSTRUCTIONS}"),
+        HumanMessage(content=format_batch_items([content for content, _ in items]))
+    ]
+    model = get_chat_model(temperature=temperature, model=model_name)
+    
+    # Capture the call's usage so it can be charged to each caller below
+    capture = UsageLedger()
+    handler = UsageCallbackHandler(capture, "psych_assistant_batch", task_type=task_type, model=model_name)
+    response = model.invoke(messages, config={"callbacks": [handler]})
+    outputs = parse_batch_outputs(response.content, len(items))
+    
+    if capture.records:
+        record_batch_usage(
+            capture.records[-1],
+            "psych_assistant_batch",
+            [config for _, config in items],
+            prompt_weights=[len(content) + 1 for content, _ in items],
+            completion_weights=[len(output or "") for output in outputs]
+        )
+    return outputs
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+def get_batcher() -> Optional[MicroBatcher]:
+    """Shared micro-batcher, or None unless MICRO_BATCH_WINDOW_MS is set"""
+    global _batcher
+    window_ms = float(os.getenv("MICRO_BATCH_WINDOW_MS") or 0)
+    if window_ms <= 0:
+        return None
+    with _batcher_lock:
+        # The first burst of requests must all share one batcher
+        if _batcher is None:
+            _batcher = MicroBatcher(
+                _run_batch,
+                _run_single,
+                window_seconds=window_ms / 1000,
+                max_batch_size=int(os.getenv("MICRO_BATCH_MAX_SIZE", "8"))
+            )
+        return _batcher
+
 def process_task(state: StateType) -> StateType:
     """Process the task based on state"""
     task = state.get('task')
+    config = prepare_usage(state)
     
-    if task == '1':  # Content generation
+    batcher = get_batcher()
+    
+    if task == '1' and batcher and state.get("content_type") in BATCHABLE_CONTENT_TYPES:
+        key = ("content", state.get("content_type"), "gpt-3.5-turbo", 0.7)
+        state['result'] = batcher.submit(key, (state.get("topic", ""), config))
+        
+    elif task == '1':  # Content generation
         messages = create_messages(
             "content",
             state.get("topic", ""),
             content_type=state.get("content_type", "LinkedIn post")
         )
-        model = ChatOpenAI(temperature=0.7, model="gpt-3.5-turbo")
-        response = model.invoke(messages)
+        model = get_chat_model(temperature=0.7, model="gpt-3.5-turbo")
+        response = model.invoke(messages, config=config)
         state['result'] = response.content
         
+    elif task == '2' and state.get("email_mode") == "template":  # Templated email
+        state['result'] = "".join(stream_template_email(state, config))
+        
     elif task == '2':  # Email drafting
         messages = create_messages(
             "email",
             state.get("details", ""),
             email_type=state.get("email_type", "intake")
         )
-        model = ChatOpenAI(temperature=0.5, model="gpt-3.5-turbo")
-        response = model.invoke(messages)
+        model = get_chat_model(temperature=0.5, model="gpt-3.5-turbo")
+        response = model.invoke(messages, config=config)
         state['result'] = response.content
         
+    elif task == '3' and batcher:  # Batched research summary
+        key = ("research", None, "gpt-3.5-turbo", 0.3)
+        state['result'] = batcher.submit(key, (state.get("topic", ""), config))
+        
     elif task == '3':  # Research summary
         messages = create_messages("research", state.get("topic", ""))
-        model = ChatOpenAI(temperature=0.3, model="gpt-3.5-turbo")
-        response = model.invoke(messages)
+        model = get_chat_model(temperature=0.3, model="gpt-3.5-turbo")
+        response = model.invoke(messages, config=config)
+        state['result'] = response.content
+    
+    return state
+
+def revise_draft(state: StateType) -> StateType:
+    """Revise state['draft'] following state['instruction'] with targeted edits"""
+    config = prepare_usage(state, task_type="revision")
+    paragraphs = split_paragraphs(state["draft"])
+    model = get_chat_model(temperature=0.3, model="gpt-3.5-turbo")
+    
+    messages = create_messages(
+        "revision",
+        number_paragraphs(paragraphs),
+        instruction=state["instruction"]
+    )
+    response = model.invoke(messages, config=config)
+    
+    try:
+        state['result'] = apply_edits(paragraphs, parse_edits(response.content))
+        state['revision_mode'] = "edits"
+    except EditError:
+        # Edits were unusable, so ask for the whole draft instead
+        messages = create_messages("rewrite", state["draft"], instruction=state["instruction"])
+        response = model.invoke(messages, config=config)
         state['result'] = response.content
+        state['revision_mode'] = "rewrite"
     
     return state
 
@@ -1,6 +1,12 @@
 import streamlit as st
-from psych_assistant import process_request
+from psych_assistant import process_request, revise_draft, stream_template_email
+from usage import BudgetExceeded, InputTooLarge
+from admission import AdmissionController, Overloaded, SessionBusy
+import hashlib
+import json
 import os
+import time
+import uuid
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -9,6 +15,53 @@ load_dotenv()
 # Initialize session state
 if 'app' not in st.session_state:
     st.session_state.app = process_request
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = str(uuid.uuid4())
+if 'draft' not in st.session_state:
+    # Current draft and every earlier version, oldest first
+    st.session_state.draft = None
+    st.session_state.revisions = []
+
+@st.cache_resource
+def get_admission_controller() -> AdmissionController:
+    """One controller shared by every session in this process."""
+    return AdmissionController.from_env()
+
+# State fields that decide what a Generate click produces
+GENERATE_FIELDS = ("task", "topic", "content_type", "email_type", "details", "email_mode")
+
+def request_key(action: str, payload: dict, fields) -> str:
+    """Key that only matches a repeat submission of the same request."""
+    content = json.dumps([payload.get(field) for field in fields])
+    return f"{action}:{hashlib.sha1(content.encode()).hexdigest()}"
+
+def run_admitted(key: str, fn, *args, stream: bool = False):
+    """Run fn through admission control, showing queue position. Returns None if shed."""
+    controller = get_admission_controller()
+    try:
+        ticket = controller.submit(st.session_state.session_id, key, fn, *args, stream=stream)
+    except (Overloaded, SessionBusy) as e:
+        st.warning(str(e))
+        return None
+    
+    if ticket.attached:
+        st.info("Your previous request is still running, so this click was merged into it.")
+    
+    status = st.empty()
+    output = st.empty()
+    while not ticket.done():
+        position = controller.position(ticket)
+        if position:
+            status.info(f"You are number {position} in the queue (about {controller.estimated_wait(ticket):.0f}s).")
+        else:
+            status.info("Generating...")
+        if stream and ticket.partial:
+            output.markdown("".join(ticket.partial))
+        time.sleep(0.1)
+    
+    status.empty()
+    output.empty()
+    return ticket.future.result()
 
 st.title("Psychologist Assistant")
 st.write("Generate content, draft emails, and get research summaries")
@@ -31,7 +84,9 @@ state = {
     "topic": None,
     "content_type": None,
     "email_type": None,
-    "details": None
+    "details": None,
+    "email_mode": None,
+    "session_id": st.session_state.session_id
 }
 
 # Task-specific inputs
@@ -47,6 +102,8 @@ elif task == "2":
         ["intake", "follow-up", "referral", "termination"]
     )
     state["details"] = st.text_area("Enter email details:")
+    if st.checkbox("Use standard template (faster)", value=True):
+        state["email_mode"] = "template"
 elif task == "3":
     state["topic"] = st.text_input("Enter the research topic:")
 
@@ -56,13 +113,67 @@ if st.button("Generate"):
        (task == "2" and state["details"]) or \
        (task == "3" and state["topic"]):
         
-        with st.spinner("Generating..."):
-            result = st.session_state.app(state)
-            st.write("### Result:")
-            st.write(result["result"])
+        try:
+            if task == "2" and state["email_mode"] == "template":
+                # Show the template immediately and stream in the personalized part
+                text = run_admitted(
+                    request_key("generate-template", state, GENERATE_FIELDS),
+                    stream_template_email, state, stream=True
+                )
+            else:
+                result = run_admitted(
+                    request_key("generate", state, GENERATE_FIELDS), st.session_state.app, state
+                )
+                text = result["result"] if result else None
+            
+            # A fresh generation starts a new revision history
+            if text:
+                st.session_state.draft = text
+                st.session_state.revisions = []
+        except (BudgetExceeded, InputTooLarge) as e:
+            st.error(str(e))
     else:
         st.error("Please fill in all required fields")
 
+# Current draft and revision mode
+if st.session_state.draft:
+    st.write("### Result:")
+    st.write(st.session_state.draft)
+    
+    instruction = st.text_input("Revise this draft (e.g. \"make it shorter\", \"warmer tone\"):")
+    col_revise, col_undo = st.columns(2)
+    
+    if col_revise.button("Revise") and instruction:
+        revision_state = {
+            "task": task,
+            "draft": st.session_state.draft,
+            "instruction": instruction,
+            "session_id": st.session_state.session_id
+        }
+        try:
+            revised = run_admitted(
+                request_key("revise", revision_state, ("draft", "instruction")), revise_draft, revision_state
+            )
+            if revised:
+                st.session_state.revisions.append({
+                    "instruction": instruction,
+                    "draft": st.session_state.draft,
+                    "mode": revised["revision_mode"]
+                })
+                st.session_state.draft = revised["result"]
+                st.rerun()
+        except (BudgetExceeded, InputTooLarge) as e:
+            st.error(str(e))
+    
+    if col_undo.button("Undo last revision", disabled=not st.session_state.revisions):
+        st.session_state.draft = st.session_state.revisions.pop()["draft"]
+        st.rerun()
+    
+    if st.session_state.revisions:
+        with st.expander(f"Revision history ({len(st.session_state.revisions)})"):
+            for number, revision in enumerate(st.session_state.revisions, 1):
+                st.markdown(f"**{number}. {revision['instruction']}** ({revision['mode']})")
+
 # Add a footer
 st.markdown("---")
 st.markdown("Built with Streamlit and LangChain")
\ No newline at end of file
@@ -0,0 +1,71 @@
+import json
+import re
+from typing import Dict, List
+
+# Edit operations the model may return
+OPERATIONS = ("replace", "delete", "insert_after")
+
+class EditError(ValueError):
+    """Raised when the model's edits can't be parsed or applied."""
+
+def split_paragraphs(draft: str) -> List[str]:
+    """Split a draft into paragraphs on blank lines."""
+    return [paragraph.strip() for paragraph in re.split(r"\n\s*\n", draft.strip()) if paragraph.strip()]
+
+def number_paragraphs(paragraphs: List[str]) -> str:
+    """Render paragraphs as [1] ..., [2] ... so edits can refer to them by number."""
+    return "\n\n".join(f"[{index}] {paragraph}" for index, paragraph in enumerate(paragraphs, 1))
+
+def parse_edits(text: str) -> List[Dict]:
+    """Parse and validate the model's JSON edit list."""
+    # Models sometimes wrap JSON in a code fence
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise EditError(f"Edits are not valid JSON: {e}")
+
+    edits = data.get("edits") if isinstance(data, dict) else data
+    if not isinstance(edits, list):
+        raise EditError("Expected a list of edits")
+
+    for edit in edits:
+        if not isinstance(edit, dict) or edit.get("op") not in OPERATIONS:
+            raise EditError(f"Unknown edit: {edit!r}")
+        paragraph = edit.get("paragraph")
+        # bool is an int subclass, but true/false is not a paragraph number
+        if not isinstance(paragraph, int) or isinstance(paragraph, bool):
+            raise EditError(f"Edit has no paragraph number: {edit!r}")
+        if edit["op"] != "delete" and not isinstance(edit.get("text"), str):
+            raise EditError(f"Edit has no text: {edit!r}")
+    return edits
+
+def apply_edits(paragraphs: List[str], edits: List[Dict]) -> str:
+    """Apply edits that refer to the original paragraph numbers."""
+    replaced: Dict[int, str] = {}
+    deleted = set()
+    inserted: Dict[int, List[str]] = {}
+
+    for edit in edits:
+        index = edit["paragraph"]
+        # insert_after 0 means insert at the top
+        lowest = 0 if edit["op"] == "insert_after" else 1
+        if not lowest <= index <= len(paragraphs):
+            raise EditError(f"Paragraph {index} does not exist")
+
+        if edit["op"] == "insert_after":
+            inserted.setdefault(index, []).append(edit["text"].strip())
+        elif index in replaced or index in deleted:
+            raise EditError(f"Paragraph {index} is edited more than once")
+        elif edit["op"] == "replace":
+            replaced[index] = edit["text"].strip()
+        else:
+            deleted.add(index)
+
+    result = list(inserted.get(0, []))
+    for index, paragraph in enumerate(paragraphs, 1):
+        if index not in deleted:
+            result.append(replaced.get(index, paragraph))
+        result.extend(inserted.get(index, []))
+
+    return "\n\n".join(paragraph for paragraph in result if paragraph)
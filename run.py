@@ -1,4 +1,6 @@
 import os
+import sys
+import uuid
 from dotenv import load_dotenv
 from agent import run_agent
 
@@ -6,6 +8,12 @@ from agent import run_agent
 load_dotenv()
 
 def main():
+    # Pass --stream to run tools while the model is still generating
+    streaming = "--stream" in sys.argv[1:]
+    
+    # Keep the conversation across turns
+    session_id = str(uuid.uuid4())
+    
     print("======================================")
     print("LangGraph Agent with Tool Usage")
     print("======================================")
@@ -22,10 +30,18 @@ def main():
         print("\nProcessing...\n")
         
         try:
-            responses = run_agent(user_input)
+            traces = []
+            responses = run_agent(user_input, streaming=streaming, session_id=session_id, traces=traces)
             
             for response in responses:
                 print(f"AI: {response.content}")
+            
+            # Show how much overlapping tools with generation saved
+            for trace in traces:
+                print(
+                    f"[turn {trace['turn']}: {trace['tool_calls']} tool call(s), "
+                    f"saved {trace['latency_saved_seconds']:.2f}s]"
+                )
                 
             print("\n--------------------------------------\n")
         except Exception as e:
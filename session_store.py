@@ -0,0 +1,171 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage, BaseMessage, FunctionMessage, HumanMessage, SystemMessage
+
+# Load environment variables
+load_dotenv()
+
+# Role codes stored in each record instead of a message class
+HUMAN, AI, FUNCTION, SYSTEM = range(4)
+
+_MESSAGE_TYPES = {HUMAN: HumanMessage, AI: AIMessage, FUNCTION: FunctionMessage, SYSTEM: SystemMessage}
+_ROLES = {HumanMessage: HUMAN, AIMessage: AI, FunctionMessage: FUNCTION, SystemMessage: SYSTEM}
+
+# Short texts (greetings, "thanks", tool names) repeat across sessions and are interned
+INTERN_MAX_LENGTH = 256
+
+def _intern(text: str) -> str:
+    return sys.intern(text) if len(text) <= INTERN_MAX_LENGTH else text
+
+@lru_cache(maxsize=128)
+def system_message(content: str) -> SystemMessage:
+    """One shared SystemMessage per distinct system prompt."""
+    return SystemMessage(content=sys.intern(content))
+
+class MessageRecord:
+    """A message held as plain slots; converted to LangChain only when needed."""
+
+    __slots__ = ("role", "content", "name", "extra")
+
+    def __init__(self, role: int, content: str, name: Optional[str] = None, extra: Optional[Dict] = None):
+        self.role = role
+        self.content = content
+        self.name = name
+        # Only set for messages carrying tool calls or similar
+        self.extra = extra
+
+    @classmethod
+    def from_message(cls, message: BaseMessage) -> "MessageRecord":
+        role = _ROLES.get(type(message))
+        if role is None:
+            # Subclasses such as AIMessageChunk
+            role = next((code for cls_, code in _ROLES.items() if isinstance(message, cls_)), HUMAN)
+        name = getattr(message, "name", None)
+        return cls(
+            role,
+            _intern(message.content) if isinstance(message.content, str) else message.content,
+            _intern(name) if name else None,
+            message.additional_kwargs or None
+        )
+
+    def to_message(self) -> BaseMessage:
+        kwargs: Dict[str, Any] = {"content": self.content}
+        if self.role == FUNCTION:
+            kwargs["name"] = self.name
+        if self.extra:
+            kwargs["additional_kwargs"] = self.extra
+        return _MESSAGE_TYPES[self.role](**kwargs)
+
+class Session:
+    """One conversation: a shared system prompt and its message records."""
+
+    __slots__ = ("system", "records", "last_used")
+
+    def __init__(self, system: Optional[str] = None):
+        self.system = system
+        self.records: List[MessageRecord] = []
+        self.last_used = time.monotonic()
+
+class SessionStore:
+    """Many live sessions with a small per-session footprint.
+
+    Sessions idle for longer than idle_seconds, and the least recently used
+    ones beyond max_sessions, are evicted as other sessions are touched.
+    Pass None to disable either limit; drop() removes a session immediately.
+    """
+
+    def __init__(self, max_sessions: Optional[int] = 10000, idle_seconds: Optional[float] = 3600.0):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        # Least recently used first
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        """Build a store from SESSION_MAX_COUNT and SESSION_IDLE_SECONDS."""
+        return cls(
+            max_sessions=int(os.getenv("SESSION_MAX_COUNT", "10000")),
+            idle_seconds=float(os.getenv("SESSION_IDLE_SECONDS", "3600"))
+        )
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def _evict(self, now: float):
+        # Called with the lock held
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            over_count = self.max_sessions is not None and len(self._sessions) > self.max_sessions
+            idle = self.idle_seconds is not None and now - session.last_used > self.idle_seconds
+            if not (over_count or idle):
+                break
+            del self._sessions[session_id]
+
+    def _touch(self, session_id: str, create: bool = True) -> Optional[Session]:
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                if not create:
+                    self._evict(now)
+                    return None
+                session = self._sessions[session_id] = Session()
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+            self._evict(now)
+            return session
+
+    def _session(self, session_id: str) -> Session:
+        return self._touch(session_id)
+
+    def set_system(self, session_id: str, content: str):
+        """Use an interned system prompt for the session."""
+        self._session(session_id).system = sys.intern(content)
+
+    def append(self, session_id: str, role: int, content: str, name: Optional[str] = None):
+        self._session(session_id).records.append(
+            MessageRecord(role, _intern(content), _intern(name) if name else None)
+        )
+
+    def extend(self, session_id: str, messages: List[BaseMessage]):
+        """Store LangChain messages as records."""
+        records = self._session(session_id).records
+        for message in messages:
+            if isinstance(message, SystemMessage):
+                self.set_system(session_id, message.content)
+            else:
+                records.append(MessageRecord.from_message(message))
+
+    def history(self, session_id: str) -> List[BaseMessage]:
+        """Conversation history as LangChain messages, without the system prompt."""
+        session = self._touch(session_id, create=False)
+        if session is None:
+            return []
+        return [record.to_message() for record in session.records]
+
+    def to_messages(self, session_id: str) -> List[BaseMessage]:
+        """Messages for the model: shared system prompt first, then the history."""
+        session = self._touch(session_id, create=False)
+        if session is None:
+            return []
+        prefix = [system_message(session.system)] if session.system else []
+        return prefix + [record.to_message() for record in session.records]
+
+    def drop(self, session_id: str):
+        """Forget a session now, e.g. when its user signs out or starts over."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+# Shared store for the process
+sessions = SessionStore.from_env()
@@ -1,7 +1,7 @@
 import os
 from typing import List, Dict, TypedDict, Annotated, Optional
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from backends import get_chat_model
 from langchain_core.messages import HumanMessage, AIMessage
 from langgraph.graph import StateGraph, END
 
@@ -30,7 +30,7 @@ def assistant_node(state: AgentState) -> AgentState:
     messages = state.get("messages", [])
     
     # Set up model
-    model = ChatOpenAI(temperature=0)
+    model = get_chat_model(temperature=0)
     
     # Generate response
     response = model.invoke(messages)
@@ -0,0 +1,148 @@
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# JSON schema types to the Python types that satisfy them
+_JSON_TYPES = {
+    "string": (str,),
+    "number": (int, float),
+    "integer": (int,),
+    "boolean": (bool,),
+    "object": (dict,),
+    "array": (list,),
+    "null": (type(None),),
+}
+
+class ToolArgumentError(ValueError):
+    """Raised when a tool call's arguments don't match the tool's schema."""
+
+def compile_validator(parameters: Dict[str, Any]) -> Callable[[Dict], Dict]:
+    """Turn a JSON parameters schema into a fast argument check, once."""
+    properties = parameters.get("properties", {})
+    required = tuple(parameters.get("required", ()))
+    known = frozenset(properties)
+    allow_extra = parameters.get("additionalProperties", True) is not False
+    checks = tuple(
+        (key, _JSON_TYPES[spec["type"]], spec["type"])
+        for key, spec in properties.items()
+        if spec.get("type") in _JSON_TYPES
+    )
+
+    def validate(arguments: Dict) -> Dict:
+        if not isinstance(arguments, dict):
+            raise ToolArgumentError("Arguments must be a JSON object")
+        for key in required:
+            if key not in arguments:
+                raise ToolArgumentError(f"Missing argument: {key}")
+        for key, types, type_name in checks:
+            if key not in arguments:
+                continue
+            value = arguments[key]
+            # bool is an int subclass but not a JSON number
+            if not isinstance(value, types) or (isinstance(value, bool) and type_name != "boolean"):
+                raise ToolArgumentError(f"Argument {key} must be of type {type_name}")
+        if not allow_extra:
+            unknown = set(arguments) - known
+            if unknown:
+                raise ToolArgumentError(f"Unknown arguments: {', '.join(sorted(unknown))}")
+        return arguments
+
+    return validate
+
+def _clean_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop pydantic's titles, which only add prompt tokens."""
+    properties = {
+        key: {field: value for field, value in spec.items() if field != "title"}
+        for key, spec in schema.get("properties", {}).items()
+    }
+    cleaned = {"type": "object", "properties": properties}
+    if schema.get("required"):
+        cleaned["required"] = list(schema["required"])
+    return cleaned
+
+class RegisteredTool:
+    """A tool's schema and validator, with its implementation loaded on demand."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        parameters: Dict[str, Any],
+        function: Optional[Callable] = None,
+        target: Optional[str] = None
+    ):
+        self.name = name
+        self.description = description
+        self.parameters = parameters
+        self.target = target
+        self.validate = compile_validator(parameters)
+        self.schema = {
+            "type": "function",
+            "function": {"name": name, "description": description, "parameters": parameters}
+        }
+        self._function = function
+        self._lock = threading.Lock()
+
+    @property
+    def function(self) -> Callable:
+        """The implementation, importing its module on first use."""
+        if self._function is None:
+            with self._lock:
+                if self._function is None:
+                    module_name, attribute = self.target.split(":", 1)
+                    self._function = getattr(importlib.import_module(module_name), attribute)
+        return self._function
+
+    @property
+    def loaded(self) -> bool:
+        return self._function is not None
+
+    def __call__(self, arguments: Dict) -> Any:
+        """Run the tool with arguments that have already been validated."""
+        # LangChain tools take their arguments as a single input dict
+        if hasattr(self.function, "invoke"):
+            return self.function.invoke(arguments)
+        return self.function(**arguments)
+
+class ToolRegistry:
+    """Tools available to the agent, with schemas serialized once."""
+
+    def __init__(self):
+        self._tools: Dict[str, RegisteredTool] = {}
+        self._schemas: Optional[List[Dict[str, Any]]] = None
+
+    def register(self, tool: Any) -> RegisteredTool:
+        """Register a LangChain tool; its schema is derived from its args schema."""
+        parameters = _clean_schema(tool.args_schema.schema()) if tool.args_schema else \
+            {"type": "object", "properties": {}}
+        return self._add(RegisteredTool(tool.name, tool.description, parameters, function=tool))
+
+    def register_lazy(
+        self,
+        name: str,
+        target: str,
+        description: str,
+        parameters: Dict[str, Any]
+    ) -> RegisteredTool:
+        """Register a tool by "module:attribute" without importing its module yet."""
+        return self._add(RegisteredTool(name, description, parameters, target=target))
+
+    def _add(self, tool: RegisteredTool) -> RegisteredTool:
+        self._tools[tool.name] = tool
+        self._schemas = None
+        return tool
+
+    def get(self, name: str) -> Optional[RegisteredTool]:
+        return self._tools.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def schemas(self) -> List[Dict[str, Any]]:
+        """OpenAI tool schemas for every registered tool, built only when tools change."""
+        if self._schemas is None:
+            self._schemas = [tool.schema for tool in self._tools.values()]
+        return self._schemas
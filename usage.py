@@ -0,0 +1,258 @@
+import os
+import threading
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# Load environment variables
+load_dotenv()
+
+# Dimensions usage can be aggregated by
+DIMENSIONS = ("entry_point", "task_type", "model", "session")
+
+# Raw records kept for debugging; totals come from running aggregates
+RECENT_RECORDS = 1000
+
+def _empty_row() -> Dict[str, int]:
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+class BudgetExceeded(RuntimeError):
+    """Raised when a user or the whole process has used up its token budget."""
+
+class InputTooLarge(ValueError):
+    """Raised when an input is over the pre-flight token limit."""
+
+# Token estimation
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken missing or its data can't be fetched
+    _encoding = None
+
+def estimate_tokens(text: str) -> int:
+    """Estimate tokens locally, without any network call."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    # Roughly four characters per token for English text
+    return len(text) // 4 + 1
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens tokens."""
+    if _encoding is not None:
+        return _encoding.decode(_encoding.encode(text)[:max_tokens])
+    return text[:max_tokens * 4]
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+class UsageLedger:
+    """Thread-safe record of token usage with optional budgets."""
+
+    def __init__(
+        self,
+        global_budget: Optional[int] = None,
+        user_budget: Optional[int] = None,
+        max_input_tokens: Optional[int] = None,
+        preflight_mode: str = "truncate"
+    ):
+        self.global_budget = global_budget
+        self.user_budget = user_budget
+        self.max_input_tokens = max_input_tokens
+        self.preflight_mode = preflight_mode
+        self.records: deque = deque(maxlen=RECENT_RECORDS)
+        self._totals: Dict[str, Dict[Any, Dict[str, int]]] = {
+            dimension: defaultdict(_empty_row) for dimension in DIMENSIONS
+        }
+        self._used_by_user: Dict[str, int] = defaultdict(int)
+        self._used_total = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "UsageLedger":
+        """Build a ledger from TOKEN_BUDGET_GLOBAL, TOKEN_BUDGET_PER_USER,
+        MAX_INPUT_TOKENS and PREFLIGHT_MODE."""
+        return cls(
+            global_budget=_env_int("TOKEN_BUDGET_GLOBAL"),
+            user_budget=_env_int("TOKEN_BUDGET_PER_USER"),
+            max_input_tokens=_env_int("MAX_INPUT_TOKENS") or 2000,
+            preflight_mode=os.getenv("PREFLIGHT_MODE", "truncate")
+        )
+
+    def preflight(self, text: Optional[str], max_tokens: Optional[int] = None) -> Optional[str]:
+        """Truncate or reject an input that is over the token limit."""
+        limit = max_tokens or self.max_input_tokens
+        if not text or limit is None:
+            return text
+
+        tokens = estimate_tokens(text)
+        if tokens <= limit:
+            return text
+        if self.preflight_mode == "reject":
+            raise InputTooLarge(
+                f"Input is about {tokens} tokens; the limit is {limit}. Please shorten it."
+            )
+        return truncate_to_tokens(text, limit)
+
+    def check_budget(self, user: Optional[str] = None, estimated_tokens: int = 0):
+        """Raise BudgetExceeded if this call would go over a budget."""
+        with self._lock:
+            if self.global_budget is not None and \
+               self._used_total + estimated_tokens > self.global_budget:
+                raise BudgetExceeded("The global token budget has been used up.")
+            if user is not None and self.user_budget is not None and \
+               self._used_by_user[user] + estimated_tokens > self.user_budget:
+                raise BudgetExceeded(f"The token budget for user {user} has been used up.")
+
+    def record(
+        self,
+        prompt_tokens: int,
+        completion_tokens: int,
+        entry_point: str,
+        task_type: Optional[str] = None,
+        model: Optional[str] = None,
+        session: Optional[str] = None,
+        user: Optional[str] = None,
+        estimated: bool = False
+    ):
+        """Store the usage of one model response."""
+        total = prompt_tokens + completion_tokens
+        record = {
+            "entry_point": entry_point,
+            "task_type": task_type,
+            "model": model,
+            "session": session,
+            "user": user,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total,
+            "estimated": estimated
+        }
+        with self._lock:
+            self.records.append(record)
+            for dimension in DIMENSIONS:
+                row = self._totals[dimension][record[dimension]]
+                row["calls"] += 1
+                row["prompt_tokens"] += prompt_tokens
+                row["completion_tokens"] += completion_tokens
+                row["total_tokens"] += total
+            self._used_total += total
+            if user is not None:
+                self._used_by_user[user] += total
+
+    def totals(self, by: str = "entry_point") -> Dict[Any, Dict[str, int]]:
+        """Aggregate token counts by one of DIMENSIONS."""
+        if by not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension {by!r}; expected one of {DIMENSIONS}")
+
+        with self._lock:
+            return {key: dict(row) for key, row in self._totals[by].items()}
+
+    def used(self, user: Optional[str] = None) -> int:
+        """Tokens used by a user, or by the whole process."""
+        with self._lock:
+            return self._used_by_user[user] if user is not None else self._used_total
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """Record token usage from every model response into a ledger."""
+
+    def __init__(self, ledger: UsageLedger, entry_point: str, **labels):
+        self.ledger = ledger
+        self.entry_point = entry_point
+        self.labels = labels
+        self._prompt_estimate = 0
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], **kwargs):
+        # Kept in case the response carries no usage (e.g. when streaming)
+        self._prompt_estimate = sum(
+            estimate_tokens(str(message.content)) for batch in messages for message in batch
+        )
+
+    def on_llm_end(self, response: LLMResult, **kwargs):
+        llm_output = response.llm_output or {}
+        token_usage = llm_output.get("token_usage") or {}
+        labels = dict(self.labels)
+        # The model that actually answered (e.g. a fallback backend) wins over
+        # the caller's label, which is only used when the response has none
+        if llm_output.get("model_name"):
+            labels["model"] = llm_output["model_name"]
+
+        if token_usage:
+            self.ledger.record(
+                token_usage.get("prompt_tokens", 0),
+                token_usage.get("completion_tokens", 0),
+                self.entry_point,
+                **labels
+            )
+            return
+
+        completion = sum(
+            estimate_tokens(generation.text)
+            for generations in response.generations for generation in generations
+        )
+        self.ledger.record(
+            self._prompt_estimate, completion, self.entry_point, estimated=True, **labels
+        )
+
+def split_tokens(total: int, weights: List[float]) -> List[int]:
+    """Split total across weights so the shares add up to exactly total."""
+    if not weights:
+        return []
+    if sum(weights) <= 0:
+        weights = [1.0] * len(weights)
+    scale = sum(weights)
+    exact = [total * weight / scale for weight in weights]
+    shares = [int(value) for value in exact]
+    # Hand out what rounding down left over, largest remainders first
+    order = sorted(range(len(exact)), key=lambda index: exact[index] - shares[index], reverse=True)
+    for index in order[:total - sum(shares)]:
+        shares[index] += 1
+    return shares
+
+def config_labels(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Labels (task type, model, session, user) of the usage handler in a config."""
+    for handler in (config or {}).get("callbacks", []):
+        if isinstance(handler, UsageCallbackHandler):
+            return dict(handler.labels)
+    return {}
+
+# Shared ledger for the process
+ledger = UsageLedger.from_env()
+
+def record_batch_usage(
+    batch: Dict[str, Any],
+    entry_point: str,
+    item_configs: List[Optional[Dict[str, Any]]],
+    prompt_weights: List[float],
+    completion_weights: List[float]
+):
+    """Record one batched call's usage against each item's own session and user.
+
+    batch is a usage record from a capture ledger; its tokens are split across
+    the items by the given weights so per-user budgets and session totals
+    still see batched requests.
+    """
+    prompt_shares = split_tokens(batch["prompt_tokens"], prompt_weights)
+    completion_shares = split_tokens(batch["completion_tokens"], completion_weights)
+    for config, prompt_tokens, completion_tokens in zip(item_configs, prompt_shares, completion_shares):
+        labels = config_labels(config)
+        labels["model"] = batch["model"] or labels.get("model")
+        labels["task_type"] = batch["task_type"] or labels.get("task_type")
+        ledger.record(prompt_tokens, completion_tokens, entry_point, estimated=batch["estimated"], **labels)
+
+def usage_config(
+    entry_point: str,
+    task_type: Optional[str] = None,
+    model: Optional[str] = None,
+    session: Optional[str] = None,
+    user: Optional[str] = None
+) -> Dict[str, Any]:
+    """Return a runnable config that records usage of the call into the shared ledger."""
+    handler = UsageCallbackHandler(
+        ledger, entry_point, task_type=task_type, model=model, session=session, user=user
+    )
+    return {"callbacks": [handler]}